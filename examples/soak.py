@@ -0,0 +1,190 @@
+"""
+長時間提交壓力測試（soak test）
+
+對本機模擬伺服器連續提交數千次檢舉，追蹤 RSS、開啟的檔案描述符與
+tracemalloc 快照，任一項成長超過門檻即以非零狀態碼結束。
+
+    python examples/soak.py --iterations 5000
+"""
+from traffic_violation import TrafficViolationSubmitter, UserInfo, ViolationInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import gc
+import io
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import tracemalloc
+
+from PIL import Image
+
+FORM_PAGE = '<html><body><form><input id="totfilesize" value="0"></form></body></html>'.encode("utf-8")
+
+def make_captcha_png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("L", (80, 30), color=255).save(buf, format="PNG")
+    return buf.getvalue()
+
+class MockHandler(BaseHTTPRequestHandler):
+    """模擬檢舉網站：表單頁、驗證碼圖片與提交端點"""
+    protocol_version = "HTTP/1.1"
+    captcha_png = make_captcha_png()
+    fail_every = 0
+    submit_count = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, body: bytes, content_type: str = "text/html; charset=utf-8"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "JSESSIONID=soak; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/traffic/traffic_write.jsp"):
+            self._reply(FORM_PAGE)
+        elif self.path.startswith("/GetCaptchaImageServlet"):
+            self._reply(self.captcha_png, "image/png")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with MockHandler.lock:
+            MockHandler.submit_count += 1
+            count = MockHandler.submit_count
+        if self.fail_every and count % self.fail_every == 0:
+            # 不回應直接斷線，讓 post 拋出例外
+            self.close_connection = True
+            return
+        self._reply("<html><body>檢舉已送出</body></html>".encode("utf-8"))
+
+def rss_bytes() -> int:
+    """目前的 RSS，非 Linux 時退回峰值 RSS"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+def open_fds() -> int:
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return -1
+
+def heap_growth(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> int:
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="交通違規檢舉提交器長時間壓力測試")
+    parser.add_argument("--iterations", type=int, default=2000, help="提交次數")
+    parser.add_argument("--warmup", type=int, default=200, help="暖機提交次數，不列入成長計算")
+    parser.add_argument("--fail-every", type=int, default=10, help="每 N 次提交讓伺服器斷線，0 表示不斷線")
+    parser.add_argument("--session-max-submissions", type=int, default=50, help="每個session最多提交次數")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=20.0, help="RSS 成長上限 (MB)")
+    parser.add_argument("--max-fd-growth", type=int, default=5, help="檔案描述符成長上限")
+    parser.add_argument("--max-heap-growth-kb", type=float, default=1024.0, help="tracemalloc 成長上限 (KB)")
+    args = parser.parse_args()
+
+    MockHandler.fail_every = args.fail_every
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    work_dir = tempfile.mkdtemp(prefix="soak_")
+    captcha_dir = os.path.join(work_dir, "captcha_catch")
+    video_file = os.path.join(work_dir, "video.mp4")
+    with open(video_file, "wb") as f:
+        f.write(os.urandom(256 * 1024))
+
+    user_info = UserInfo(
+        name="測試",
+        gender="male",
+        sub="A123456789",
+        address="臺中市西屯區台灣大道三段99號",
+        phone="0912345678",
+        email="soak@example.com",
+    )
+    violation_info = ViolationInfo(
+        video_file=video_file,
+        violation_datetime="2025-01-01 08:00",
+        license_plate="ABC-1234",
+        location="臺中市西屯區台灣大道三段99號",
+    )
+
+    tracemalloc.start()
+    failures = []
+    successes = 0
+    with TrafficViolationSubmitter(
+        log_file=os.path.join(work_dir, "soak.log"),
+        captcha_temp_dir=captcha_dir,
+        enable_ocr=False,
+        session_max_submissions=args.session_max_submissions,
+    ) as submitter:
+        # 指向本機模擬伺服器
+        submitter.base_url = host + "/traffic/"
+        submitter.form_url = submitter.base_url + "traffic_write.jsp"
+        submitter.submit_url = submitter.base_url + "traffic_writesave.jsp"
+        submitter.captcha_url = host + "/GetCaptchaImageServlet"
+        submitter.headers["Referer"] = submitter.form_url
+
+        base_rss, base_fds = rss_bytes(), open_fds()
+        base_snapshot = tracemalloc.take_snapshot()
+        for i in range(args.warmup + args.iterations):
+            if i == args.warmup:
+                gc.collect()
+                base_rss, base_fds = rss_bytes(), open_fds()
+                base_snapshot = tracemalloc.take_snapshot()
+
+            result = submitter.submit_violation(user_info, violation_info, captcha_text="ABCD")
+            successes += result.success
+
+            leftovers = os.listdir(captcha_dir)
+            if leftovers:
+                failures.append(f"第 {i + 1} 次提交後仍有驗證碼圖片：{leftovers}")
+                break
+
+            if (i + 1) % 500 == 0:
+                print(f"{i + 1} 次：RSS={rss_bytes() / 2**20:.1f}MB FD={open_fds()} 成功={successes}")
+
+        gc.collect()
+        rss_growth = rss_bytes() - base_rss
+        fd_growth = open_fds() - base_fds
+        heap = heap_growth(base_snapshot, tracemalloc.take_snapshot())
+    tracemalloc.stop()
+    if os.listdir(captcha_dir):
+        failures.append(f"關閉後仍有驗證碼圖片：{os.listdir(captcha_dir)}")
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"RSS 成長：{rss_growth / 2**20:.2f}MB")
+    print(f"FD 成長：{fd_growth}")
+    print(f"tracemalloc 成長：{heap / 1024:.1f}KB")
+
+    if rss_growth > args.max_rss_growth_mb * 2**20:
+        failures.append(f"RSS 成長 {rss_growth / 2**20:.2f}MB 超過 {args.max_rss_growth_mb}MB")
+    if fd_growth > args.max_fd_growth:
+        failures.append(f"FD 成長 {fd_growth} 超過 {args.max_fd_growth}")
+    if heap > args.max_heap_growth_kb * 1024:
+        failures.append(f"tracemalloc 成長 {heap / 1024:.1f}KB 超過 {args.max_heap_growth_kb}KB")
+    if args.fail_every != 1 and successes == 0:
+        failures.append("沒有任何成功的提交，請檢查模擬伺服器")
+
+    for failure in failures:
+        print(f"失敗：{failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
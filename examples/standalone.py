@@ -48,13 +48,16 @@ def main():
         except ValueError:
             max_retries = 3
     
-    # 建立提交器
-    submitter = TrafficViolationSubmitter(
+    # 建立提交器，離開 with 時自動關閉 session 並清理驗證碼圖片
+    with TrafficViolationSubmitter(
         captcha_temp_dir=captcha_dir,
         enable_ocr=enable_ocr,
         max_captcha_retries=max_retries
-    )
-    
+    ) as submitter:
+        run(submitter, enable_ocr, max_retries)
+    print("已清理所有驗證碼圖片")
+
+def run(submitter: TrafficViolationSubmitter, enable_ocr: bool, max_retries: int):
     print(f"設定完成：OCR={'啟用' if enable_ocr else '停用'}，重試次數={max_retries}")
     
     name = input("\n姓名：")
@@ -144,10 +147,6 @@ def main():
         
         if input("\n是否繼續檢舉？(y/n)：").lower() != 'y':
             break
-    
-    # 清理所有驗證碼圖片
-    submitter.cleanup_all_captcha_images()
-    print("已清理所有驗證碼圖片")
 
 if __name__ == "__main__":
     main()
@@ -8,19 +8,22 @@ import pytesseract
 import re
 import tempfile
 import shutil
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, Set
 
 from .models import UserInfo, ViolationInfo, SubmissionResult
 from .exceptions import TrafficViolationError, CaptchaError, SubmissionError
 
 class TrafficViolationSubmitter:
-    def __init__(self, log_file: str = "traffic_violation.log", captcha_temp_dir: Optional[str] = None, enable_ocr: bool = True, max_captcha_retries: int = 3):
+    def __init__(self, log_file: str = "traffic_violation.log", captcha_temp_dir: Optional[str] = None, enable_ocr: bool = True, max_captcha_retries: int = 3, session_max_submissions: int = 50):
         """
+        可搭配 with 使用，離開時會關閉 session 並清理本實例產生的驗證碼圖片
+
         Args:
             log_file: 日誌檔案路徑
             captcha_temp_dir: 驗證碼暫存資料夾，None則使用當前路徑下的captcha_catch
             enable_ocr: 是否啟用OCR自動識別驗證碼
             max_captcha_retries: 驗證碼識別最大重試次數
+            session_max_submissions: 每個session最多提交次數，超過後重建session，0表示不重建
         """
         # 配置日誌
         logging.basicConfig(
@@ -34,6 +37,7 @@ class TrafficViolationSubmitter:
         # Set captcha settings
         self.enable_ocr = enable_ocr
         self.max_captcha_retries = max_captcha_retries
+        self.session_max_submissions = session_max_submissions
         
         # Set captcha temporary directory
         if captcha_temp_dir:
@@ -57,8 +61,39 @@ class TrafficViolationSubmitter:
             "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
         }
         
+        # 本實例產生的驗證碼圖片，清理時只處理這些檔案
+        self._captcha_files: Set[str] = set()
+        self._closed = False
+
         # 建立session
         self.session = requests.Session()
+        self._session_submissions = 0
+
+    def __enter__(self) -> "TrafficViolationSubmitter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close session and clean up captcha images created by this instance
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.cleanup_all_captcha_images()
+        self.session.close()
+        self.logger.info("提交器已關閉")
+
+    def reset_session(self):
+        """
+        Recreate session, dropping cookies and pooled connections
+        """
+        self.session.close()
+        self.session = requests.Session()
+        self._session_submissions = 0
+        self.logger.info("session已重建")
 
     def get_captcha_image(self) -> str:
         """
@@ -75,9 +110,10 @@ class TrafficViolationSubmitter:
             )
             captcha_response.raise_for_status()
             
-            # 使用暫存資料夾
-            captcha_path = os.path.join(self.captcha_temp_dir, f"captcha_{int(time.time())}.png")
-            with open(captcha_path, "wb") as f:
+            # 使用暫存資料夾，檔名唯一避免與其他實例衝突
+            fd, captcha_path = tempfile.mkstemp(prefix="captcha_", suffix=".png", dir=self.captcha_temp_dir)
+            self._captcha_files.add(captcha_path)
+            with os.fdopen(fd, "wb") as f:
                 f.write(captcha_response.content)
             
             self.logger.info("驗證碼圖片獲取成功")
@@ -98,7 +134,8 @@ class TrafficViolationSubmitter:
             識別出的驗證碼文字
         """
         try:
-            captcha_image = Image.open(image_path).convert("L")
+            with Image.open(image_path) as image:
+                captcha_image = image.convert("L")
             captcha_image = captcha_image.filter(ImageFilter.SHARPEN)
             captcha_image = ImageEnhance.Contrast(captcha_image).enhance(2.0)
             
@@ -126,6 +163,7 @@ class TrafficViolationSubmitter:
         Args:
             image_path: 驗證碼圖片路徑
         """
+        self._captcha_files.discard(image_path)
         try:
             if os.path.exists(image_path):
                 os.remove(image_path)
@@ -133,18 +171,16 @@ class TrafficViolationSubmitter:
         except Exception as e:
             self.logger.warning(f"清理驗證碼圖片失敗：{e}")
 
-    def cleanup_all_captcha_images(self):
+    def cleanup_all_captcha_images(self, keep: Optional[str] = None):
         """
-        Clean up all captcha images
+        Clean up all captcha images created by this instance
+
+        Args:
+            keep: 保留不清理的驗證碼圖片路徑
         """
-        try:
-            for filename in os.listdir(self.captcha_temp_dir):
-                if filename.startswith("captcha_") and filename.endswith(".png"):
-                    file_path = os.path.join(self.captcha_temp_dir, filename)
-                    os.remove(file_path)
-            self.logger.info("所有驗證碼圖片已清理")
-        except Exception as e:
-            self.logger.warning(f"清理所有驗證碼圖片失敗：{e}")
+        for file_path in list(self._captcha_files):
+            if file_path != keep:
+                self.cleanup_captcha_image(file_path)
 
     def parse_location(self, location: str) -> Tuple[str, str, str]:
         """
@@ -207,7 +243,22 @@ class TrafficViolationSubmitter:
             提交結果
         """
         captcha_path = None
+        keep_captcha = False
         try:
+            # 清理上一次保留給手動輸入的驗證碼圖片
+            captcha_pending = bool(self._captcha_files)
+            self.cleanup_all_captcha_images()
+
+            # Recycle session to avoid cookies and connections piling up,
+            # but not while a manual captcha is tied to the current session
+            if (
+                self.session_max_submissions
+                and not captcha_pending
+                and self._session_submissions >= self.session_max_submissions
+            ):
+                self.reset_session()
+            self._session_submissions += 1
+
             # Check video file
             if not os.path.exists(violation_info.video_file):
                 return SubmissionResult(
@@ -237,6 +288,7 @@ class TrafficViolationSubmitter:
                 else:
                     # Disable OCR, require manual input
                     captcha_path = self.get_captcha_image()
+                    keep_captcha = True
                     return SubmissionResult(
                         success=False,
                         message="需要手動輸入驗證碼",
@@ -284,24 +336,22 @@ class TrafficViolationSubmitter:
                 "captcha": captcha_text,
             }
 
-            # Prepare file
-            files = {
-                "filename1": (
-                    os.path.basename(violation_info.video_file),
-                    open(violation_info.video_file, "rb"),
-                    "video/mp4",
+            # Prepare file and submit form, file is closed even if post raises
+            with open(violation_info.video_file, "rb") as video_file:
+                files = {
+                    "filename1": (
+                        os.path.basename(violation_info.video_file),
+                        video_file,
+                        "video/mp4",
+                    )
+                }
+                response = self.session.post(
+                    self.submit_url, 
+                    headers=self.headers, 
+                    data=form_data, 
+                    files=files, 
+                    timeout=30
                 )
-            }
-
-            # Submit form
-            response = self.session.post(
-                self.submit_url, 
-                headers=self.headers, 
-                data=form_data, 
-                files=files, 
-                timeout=30
-            )
-            files["filename1"][1].close()
 
             # Check result
             if response.status_code == 200:
@@ -354,9 +404,9 @@ class TrafficViolationSubmitter:
                 captcha_path=captcha_path
             )
         finally:
-            # Clean up captcha image
-            if captcha_path:
-                self.cleanup_captcha_image(captcha_path)
+            # Clean up captcha images, including ones downloaded by OCR retries,
+            # but keep the one waiting for manual input
+            self.cleanup_all_captcha_images(keep=captcha_path if keep_captcha else None)
 
     def _try_ocr_with_retry(self, captcha_path: str) -> str:
         """
@@ -389,6 +439,6 @@ class TrafficViolationSubmitter:
 
     def __del__(self):
         try:
-            self.cleanup_all_captcha_images()
+            self.close()
         except:
             pass